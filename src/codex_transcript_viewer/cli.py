@@ -5,7 +5,7 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
-from .html_builder import build_html
+from .html_builder import write_html
 from .parser import extract_conversation, parse_jsonl
 
 
@@ -26,9 +26,9 @@ def main() -> None:
 
     entries = parse_jsonl(inpath)
     meta, events = extract_conversation(entries)
-    html_content = build_html(meta, events)
 
-    outpath.write_text(html_content, encoding="utf-8")
+    with open(outpath, "w", encoding="utf-8", buffering=1 << 20) as f:
+        write_html(meta, events, f)
     size = outpath.stat().st_size
     print(f"written to {outpath} ({size:,} bytes, {len(events)} events)")
 
@@ -3,21 +3,46 @@
 from __future__ import annotations
 
 from datetime import datetime
+from functools import lru_cache
 
+try:  # C ISO-8601 parser that handles "Z" natively; optional
+    from ciso8601 import parse_datetime as _parse_iso
+except ImportError:
 
+    def _parse_iso(ts_str: str) -> datetime:
+        return datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
+
+
+@lru_cache(maxsize=4096)
 def format_ts(ts_str: str) -> str:
-    """Format an ISO timestamp to HH:MM:SS for inline display."""
+    """Format an ISO timestamp to HH:MM:SS for inline display.
+
+    Results are memoized since transcripts repeat the same timestamp
+    across the sidebar and message body, and across events within the
+    same second.
+
+    A well-formed ISO timestamp carries HH:MM:SS at characters 11:19, so
+    the common case is a plain slice; parsing only happens when the string
+    doesn't have the expected shape.
+    """
     try:
-        dt = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-        return dt.strftime("%H:%M:%S")
+        if len(ts_str) >= 19 and ts_str[4] == "-" and ts_str[10] in "T " and ts_str[13] == ":":
+            return ts_str[11:19]
+        return _parse_iso(ts_str).strftime("%H:%M:%S")
     except (ValueError, TypeError):
         return ts_str[:19] if ts_str else ""
 
 
+@lru_cache(maxsize=4096)
 def format_ts_full(ts_str: str) -> str:
-    """Format an ISO timestamp to a full human-readable UTC string."""
+    """Format an ISO timestamp to a full human-readable UTC string.
+
+    Memoized for the same reason as :func:`format_ts`, with the same
+    slice-based fast path for well-formed input.
+    """
     try:
-        dt = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-        return dt.strftime("%Y-%m-%d %H:%M:%S UTC")
+        if len(ts_str) >= 19 and ts_str[4] == "-" and ts_str[10] in "T " and ts_str[13] == ":":
+            return ts_str[:10] + " " + ts_str[11:19] + " UTC"
+        return _parse_iso(ts_str).strftime("%Y-%m-%d %H:%M:%S UTC")
     except (ValueError, TypeError):
         return ts_str or ""
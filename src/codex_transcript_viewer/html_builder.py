@@ -3,11 +3,40 @@
 from __future__ import annotations
 
 import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from importlib import resources
+from io import StringIO
+from typing import Callable, TextIO
+
+try:  # optional accelerated JSON for tool-arg parsing and pretty-printing
+    import orjson
+except ImportError:
+    orjson = None
 
 from .formatting import format_ts, format_ts_full
 from .markdown import escape, render_markdown
+from .parser import Event
+
+if orjson is not None:
+    _loads = orjson.loads
+
+    def _dumps_compact(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _dumps_indent(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+else:
+    _loads = json.loads
+
+    def _dumps_compact(obj) -> str:
+        return json.dumps(obj, indent=None)
+
+    def _dumps_indent(obj) -> str:
+        return json.dumps(obj, indent=2)
 
 
 def _load_asset(name: str) -> str:
@@ -15,8 +44,21 @@ def _load_asset(name: str) -> str:
     return resources.files(__package__).joinpath(name).read_text(encoding="utf-8")
 
 
-def build_html(meta: dict | None, events: list[dict]) -> str:
-    """Build a self-contained HTML string from session metadata and events."""
+# Loaded once at import; resources.files does a package-resolver walk on
+# every call, and the assets never change within a process.
+_CSS = _load_asset("style.css")
+_JS = _load_asset("viewer.js")
+
+
+def write_html(meta: dict | None, events: list[Event], out: TextIO) -> None:
+    """Stream the HTML viewer for a session to an open text file.
+
+    Message blocks hold the bulk of the document (full text, tool outputs,
+    rendered markdown), so they are spooled to a temporary file during the
+    event pass and chunk-copied into place; only the much smaller sidebar
+    is buffered in memory. Peak memory stays proportional to the sidebar
+    rather than the whole document.
+    """
     session_id = meta.get("id", "unknown") if meta else "unknown"
     model = meta.get("model_provider", "") if meta else ""
     cli_version = meta.get("cli_version", "") if meta else ""
@@ -25,228 +67,354 @@ def build_html(meta: dict | None, events: list[dict]) -> str:
     commit = (meta.get("git", {}).get("commit_hash", "") or "")[:12] if meta else ""
     session_ts = meta.get("timestamp", "") if meta else ""
 
-    sidebar_items: list[str] = []
-    message_blocks: list[str] = []
-    msg_idx = 0
+    sidebar_buf = StringIO()
+    sidebar_write = sidebar_buf.write
 
-    for evt in events:
-        etype = evt["type"]
-        ts = format_ts(evt["ts"])
-        msg_idx += 1
-        anchor = f"msg-{msg_idx}"
-
-        handler = _EVENT_HANDLERS.get(etype)
-        if handler:
-            handler(evt, ts, anchor, sidebar_items, message_blocks)
-
-    css = _load_asset("style.css")
-    js = _load_asset("viewer.js")
-
-    sidebar_html = "\n".join(sidebar_items)
-    messages_html = "\n".join(message_blocks)
-    generated = datetime.now().strftime("%Y-%m-%d %H:%M")
-
-    return _HTML_TEMPLATE.format(
-        title=escape(session_id[:12]),
-        css=css,
-        js=js,
-        sidebar_html=sidebar_html,
-        messages_html=messages_html,
-        session_id_short=escape(session_id[:12]),
-        session_ts_short=escape(format_ts_full(session_ts)),
-        session_id=escape(session_id),
-        session_ts=escape(format_ts_full(session_ts)),
-        model=escape(model),
-        cli_version=escape(cli_version),
-        cwd=escape(cwd),
-        git_info=escape(branch) + ((" @ " + escape(commit)) if commit else ""),
-        generated=generated,
-    )
-
-
-# ---------------------------------------------------------------------------
-# Per-event-type rendering functions
-# ---------------------------------------------------------------------------
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as messages_tmp:
+        messages_write = messages_tmp.write
 
-def _render_user_message(evt, ts, anchor, sidebar, messages):
-    text_preview = evt["text"][:80].replace("\n", " ")
-    sidebar.append(
-        f'<a class="tree-node tree-role-user" href="#{anchor}">'
-        f'<span class="tree-ts">{ts}</span> '
-        f'<span class="tree-content">\U0001f464 {escape(text_preview)}</span></a>'
-    )
-    messages.append(
-        f'<div class="user-message" id="{anchor}">'
-        f'<div class="message-timestamp">{ts}</div>'
-        f'<div class="markdown-content">{render_markdown(evt["text"])}</div>'
-        f"</div>"
-    )
+        if len(events) >= _PARALLEL_THRESHOLD:
+            _render_events_parallel(events, sidebar_write, messages_write)
+        else:
+            _render_events(events, 0, sidebar_write, messages_write)
+
+        title = escape(session_id[:12])
+        session_ts_full = escape(format_ts_full(session_ts))
+        now = datetime.now()
+        generated = f"{now.year:04d}-{now.month:02d}-{now.day:02d} {now.hour:02d}:{now.minute:02d}"
+
+        _write_shell_prefix(
+            out,
+            title=title,
+            css=_CSS,
+            session_ts=session_ts_full,
+        )
+        # Handlers prefix each block with a newline separator; drop the
+        # leading one so the markup matches a "\n".join of blocks.
+        out.write(sidebar_buf.getvalue()[1:])
+        _write_shell_mid(
+            out,
+            session_id=escape(session_id),
+            session_ts=session_ts_full,
+            model=escape(model),
+            cli_version=escape(cli_version),
+            cwd=escape(cwd),
+            git_info=escape(branch) + ((" @ " + escape(commit)) if commit else ""),
+        )
+        messages_tmp.seek(0)
+        messages_tmp.read(1)  # consume the leading block separator
+        shutil.copyfileobj(messages_tmp, out, 1 << 20)
+        _write_shell_suffix(out, js=_JS, generated=generated)
+
+
+def build_html(meta: dict | None, events: list[Event]) -> str:
+    """Build a self-contained HTML string from session metadata and events."""
+    buf = StringIO()
+    write_html(meta, events, buf)
+    return buf.getvalue()
 
 
-def _render_reasoning(evt, ts, anchor, sidebar, messages):
-    sidebar.append(
-        f'<a class="tree-node tree-role-thinking" href="#{anchor}">'
-        f'<span class="tree-ts">{ts}</span> '
-        f'<span class="tree-content">\U0001f4ad {escape(evt["text"][:60])}</span></a>'
-    )
-    messages.append(
-        f'<div class="thinking-block" id="{anchor}">'
-        f'<div class="message-timestamp">{ts}</div>'
-        f'<div class="thinking-text">{escape(evt["text"])}</div>'
-        f"</div>"
-    )
+# Sessions at or above this size are rendered by a process pool; below it
+# the fork/pickle overhead outweighs the parallel markdown/escape work.
+_PARALLEL_THRESHOLD = 2000
 
 
-def _render_agent_commentary(evt, ts, anchor, sidebar, messages):
-    sidebar.append(
-        f'<a class="tree-node tree-role-assistant" href="#{anchor}">'
-        f'<span class="tree-ts">{ts}</span> '
-        f'<span class="tree-content">\U0001f4ac {escape(evt["text"][:60])}</span></a>'
-    )
-    messages.append(
-        f'<div class="commentary-message" id="{anchor}">'
-        f'<div class="message-timestamp">{ts}</div>'
-        f'<div class="markdown-content">{render_markdown(evt["text"])}</div>'
-        f"</div>"
-    )
+def _render_events(
+    events: list[Event],
+    start_idx: int,
+    sidebar_write: Callable[[str], object],
+    messages_write: Callable[[str], object],
+) -> None:
+    """Render a run of events, numbering anchors from ``start_idx + 1``."""
+    # Loop locals: LOAD_FAST instead of LOAD_GLOBAL/LOAD_ATTR per event.
+    handlers_get = _EVENT_HANDLERS.get
+    fmt_ts = format_ts
+    msg_idx = start_idx
 
+    for evt in events:
+        msg_idx += 1
+        handler = handlers_get(evt.type)
+        if handler:
+            handler(evt, fmt_ts(evt.ts), f"msg-{msg_idx}", sidebar_write, messages_write)
+
+
+def _render_chunk(events: list[Event], start_idx: int) -> tuple[str, str]:
+    """Worker entry point: render one contiguous chunk to two strings."""
+    sidebar_buf = StringIO()
+    messages_buf = StringIO()
+    _render_events(events, start_idx, sidebar_buf.write, messages_buf.write)
+    return sidebar_buf.getvalue(), messages_buf.getvalue()
+
+
+def _render_events_parallel(
+    events: list[Event],
+    sidebar_write: Callable[[str], object],
+    messages_write: Callable[[str], object],
+) -> None:
+    """Render events across a process pool, concatenating chunks in order.
+
+    Rendering is pure per event, so contiguous ranges can be farmed out to
+    worker processes (sidestepping the GIL for the markdown/escape work)
+    and their output stitched back together in chunk order. Anchor
+    numbering is preserved by passing each chunk its index offset.
+    """
+    workers = os.cpu_count() or 1
+    if workers == 1:
+        _render_events(events, 0, sidebar_write, messages_write)
+        return
 
-def _render_assistant_text(evt, ts, anchor, sidebar, messages):
-    phase_label = f' ({evt["phase"]})' if evt.get("phase") else ""
-    preview = evt["text"][:60].replace("\n", " ")
-    sidebar.append(
-        f'<a class="tree-node tree-role-assistant" href="#{anchor}">'
-        f'<span class="tree-ts">{ts}</span> '
-        f'<span class="tree-content">\U0001f916 {escape(preview)}</span></a>'
-    )
-    messages.append(
-        f'<div class="assistant-message" id="{anchor}">'
-        f'<div class="message-timestamp">{ts}{escape(phase_label)}</div>'
-        f'<div class="assistant-text markdown-content">{render_markdown(evt["text"])}</div>'
-        f"</div>"
-    )
+    chunk_size = -(-len(events) // workers)  # ceil division
+    offsets = range(0, len(events), chunk_size)
+    chunks = [events[i : i + chunk_size] for i in offsets]
 
+    with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+        for sidebar_part, messages_part in pool.map(_render_chunk, chunks, offsets):
+            sidebar_write(sidebar_part)
+            messages_write(messages_part)
 
-def _render_tool_call(evt, ts, anchor, sidebar, messages):
-    name = evt["name"]
-    try:
-        args = json.loads(evt["arguments"])
-        args_preview = args.get("cmd", "")[:80] if name == "exec_command" else json.dumps(args, indent=None)[:80]
-    except (json.JSONDecodeError, TypeError):
-        args_preview = evt["arguments"][:80]
 
-    sidebar.append(
-        f'<a class="tree-node tree-role-tool" href="#{anchor}">'
-        f'<span class="tree-ts">{ts}</span> '
-        f'<span class="tree-content">\u26a1 {escape(name)}: {escape(args_preview)}</span></a>'
-    )
+# ---------------------------------------------------------------------------
+# Per-event-type rendering functions
+#
+# Each handler receives the bound .write methods of the sidebar and messages
+# buffers and emits its markup as a sequence of writes (prefixed with a "\n"
+# block separator), avoiding per-event f-string materialization and the
+# final join copy over two big lists.
+# ---------------------------------------------------------------------------
 
+def _render_user_message(evt, ts, anchor, sidebar_write, messages_write):
+    text = evt.text
+    text_preview = text[:80].replace("\n", " ")
+    sidebar_write('\n<a class="tree-node tree-role-user" href="#')
+    sidebar_write(anchor)
+    sidebar_write('"><span class="tree-ts">')
+    sidebar_write(ts)
+    sidebar_write('</span> <span class="tree-content">\U0001f464 ')
+    sidebar_write(escape(text_preview))
+    sidebar_write("</span></a>")
+    messages_write('\n<div class="user-message" id="')
+    messages_write(anchor)
+    messages_write('"><div class="message-timestamp">')
+    messages_write(ts)
+    messages_write('</div><div class="markdown-content">')
+    messages_write(render_markdown(text))
+    messages_write("</div></div>")
+
+
+def _render_reasoning(evt, ts, anchor, sidebar_write, messages_write):
+    text = evt.text
+    sidebar_write('\n<a class="tree-node tree-role-thinking" href="#')
+    sidebar_write(anchor)
+    sidebar_write('"><span class="tree-ts">')
+    sidebar_write(ts)
+    sidebar_write('</span> <span class="tree-content">\U0001f4ad ')
+    sidebar_write(escape(text[:60]))
+    sidebar_write("</span></a>")
+    messages_write('\n<div class="thinking-block" id="')
+    messages_write(anchor)
+    messages_write('"><div class="message-timestamp">')
+    messages_write(ts)
+    messages_write('</div><div class="thinking-text">')
+    messages_write(escape(text))
+    messages_write("</div></div>")
+
+
+def _render_agent_commentary(evt, ts, anchor, sidebar_write, messages_write):
+    text = evt.text
+    sidebar_write('\n<a class="tree-node tree-role-assistant" href="#')
+    sidebar_write(anchor)
+    sidebar_write('"><span class="tree-ts">')
+    sidebar_write(ts)
+    sidebar_write('</span> <span class="tree-content">\U0001f4ac ')
+    sidebar_write(escape(text[:60]))
+    sidebar_write("</span></a>")
+    messages_write('\n<div class="commentary-message" id="')
+    messages_write(anchor)
+    messages_write('"><div class="message-timestamp">')
+    messages_write(ts)
+    messages_write('</div><div class="markdown-content">')
+    messages_write(render_markdown(text))
+    messages_write("</div></div>")
+
+
+def _render_assistant_text(evt, ts, anchor, sidebar_write, messages_write):
+    text = evt.text
+    phase_label = f" ({evt.phase})" if evt.phase else ""
+    preview = text[:60].replace("\n", " ")
+    sidebar_write('\n<a class="tree-node tree-role-assistant" href="#')
+    sidebar_write(anchor)
+    sidebar_write('"><span class="tree-ts">')
+    sidebar_write(ts)
+    sidebar_write('</span> <span class="tree-content">\U0001f916 ')
+    sidebar_write(escape(preview))
+    sidebar_write("</span></a>")
+    messages_write('\n<div class="assistant-message" id="')
+    messages_write(anchor)
+    messages_write('"><div class="message-timestamp">')
+    messages_write(ts)
+    messages_write(escape(phase_label))
+    messages_write('</div><div class="assistant-text markdown-content">')
+    messages_write(render_markdown(text))
+    messages_write("</div></div>")
+
+
+def _render_tool_call(evt, ts, anchor, sidebar_write, messages_write):
+    name = evt.name
+    arguments = evt.arguments
+    # Parse once; both the sidebar preview and the args display reuse it.
     try:
-        args_obj = json.loads(evt["arguments"])
-        if name == "exec_command":
-            args_display = f'<span class="tool-command">$ {escape(args_obj.get("cmd", ""))}</span>'
-        else:
-            args_display = f"<pre>{escape(json.dumps(args_obj, indent=2))}</pre>"
+        args_obj = _loads(arguments)
+        parsed = True
     except (json.JSONDecodeError, TypeError):
-        args_display = f"<pre>{escape(evt['arguments'])}</pre>"
-
-    messages.append(
-        f'<div class="tool-execution pending" id="{anchor}">'
-        f'<div class="message-timestamp">{ts}</div>'
-        f'<div class="tool-header"><span class="tool-name">{escape(name)}</span></div>'
-        f'<div class="tool-args">{args_display}</div>'
-        f"</div>"
-    )
-
-
-def _render_tool_output(evt, ts, anchor, sidebar, messages):
-    output = evt["output"]
+        args_obj = None
+        parsed = False
+
+    if not parsed:
+        args_preview = arguments[:80]
+    elif name == "exec_command":
+        args_preview = args_obj.get("cmd", "")[:80]
+    else:
+        args_preview = _dumps_compact(args_obj)[:80]
+
+    esc_name = escape(name)
+
+    sidebar_write('\n<a class="tree-node tree-role-tool" href="#')
+    sidebar_write(anchor)
+    sidebar_write('"><span class="tree-ts">')
+    sidebar_write(ts)
+    sidebar_write('</span> <span class="tree-content">\u26a1 ')
+    sidebar_write(esc_name)
+    sidebar_write(": ")
+    sidebar_write(escape(args_preview))
+    sidebar_write("</span></a>")
+
+    messages_write('\n<div class="tool-execution pending" id="')
+    messages_write(anchor)
+    messages_write('"><div class="message-timestamp">')
+    messages_write(ts)
+    messages_write('</div><div class="tool-header"><span class="tool-name">')
+    messages_write(esc_name)
+    messages_write('</span></div><div class="tool-args">')
+    if not parsed:
+        messages_write("<pre>")
+        messages_write(escape(arguments))
+        messages_write("</pre>")
+    elif name == "exec_command":
+        messages_write('<span class="tool-command">$ ')
+        messages_write(escape(args_obj.get("cmd", "")))
+        messages_write("</span>")
+    else:
+        messages_write("<pre>")
+        messages_write(escape(_dumps_indent(args_obj)))
+        messages_write("</pre>")
+    messages_write("</div></div>")
+
+
+def _render_tool_output(evt, ts, anchor, sidebar_write, messages_write):
+    output = evt.output
     truncated = len(output) > 2000
-    preview = output[:2000]
-
-    sidebar.append(
-        f'<a class="tree-node tree-role-tool" href="#{anchor}">'
-        f'<span class="tree-ts">{ts}</span> '
-        f'<span class="tree-content">\U0001f4e4 output ({len(output)} chars)</span></a>'
-    )
-
-    expandable_class = " expandable" if truncated else ""
-    expand_hint = (
-        f'\n<span class="expand-hint">[click to expand {len(output)} chars]</span>'
-        if truncated
-        else ""
-    )
-
-    messages.append(
-        f'<div class="tool-execution success" id="{anchor}">'
-        f'<div class="tool-output{expandable_class}" onclick="this.classList.toggle(\'expanded\')">'
-        f'<div class="output-preview"><pre>{escape(preview)}{expand_hint}</pre></div>'
-        f'<div class="output-full"><pre>{escape(output)}</pre></div>'
-        f"</div></div>"
-    )
-
-
-def _render_task_complete(evt, ts, anchor, sidebar, messages):
-    preview = evt["text"][:60].replace("\n", " ")
-    sidebar.append(
-        f'<a class="tree-node tree-role-assistant" href="#{anchor}">'
-        f'<span class="tree-ts">{ts}</span> '
-        f'<span class="tree-content">\u2705 {escape(preview)}</span></a>'
-    )
-    messages.append(
-        f'<div class="assistant-message final-answer" id="{anchor}">'
-        f'<div class="message-timestamp">{ts} \u2014 final answer</div>'
-        f'<div class="assistant-text markdown-content">{render_markdown(evt["text"])}</div>'
-        f"</div>"
-    )
-
-
-def _render_task_started(evt, ts, anchor, sidebar, messages):
-    sidebar.append(
-        f'<a class="tree-node tree-role-system" href="#{anchor}">'
-        f'<span class="tree-ts">{ts}</span> '
-        f'<span class="tree-content">\u25b6 Turn started</span></a>'
-    )
-    messages.append(
-        f'<div class="system-event" id="{anchor}">'
-        f'<div class="message-timestamp">{ts}</div>'
-        f'<span class="event-label">\u25b6 Turn started</span>'
-        f"</div>"
-    )
-
-
-def _render_turn_aborted(evt, ts, anchor, sidebar, messages):
-    reason = escape(evt["reason"])
-    sidebar.append(
-        f'<a class="tree-node tree-role-error" href="#{anchor}">'
-        f'<span class="tree-ts">{ts}</span> '
-        f'<span class="tree-content">\u26d4 Turn aborted: {reason}</span></a>'
-    )
-    messages.append(
-        f'<div class="system-event error-event" id="{anchor}">'
-        f'<div class="message-timestamp">{ts}</div>'
-        f'<span class="event-label error-text">\u26d4 Turn aborted: {reason}</span>'
-        f"</div>"
-    )
-
-
-def _render_thread_rolled_back(evt, ts, anchor, sidebar, messages):
-    n = evt["num_turns"]
-    sidebar.append(
-        f'<a class="tree-node tree-role-system" href="#{anchor}">'
-        f'<span class="tree-ts">{ts}</span> '
-        f'<span class="tree-content">\u21a9 Rolled back {n} turn(s)</span></a>'
-    )
-    messages.append(
-        f'<div class="system-event" id="{anchor}">'
-        f'<div class="message-timestamp">{ts}</div>'
-        f'<span class="event-label">\u21a9 Rolled back {n} turn(s)</span>'
-        f"</div>"
-    )
-
-
-def _render_token_count(evt, ts, anchor, sidebar, messages):
-    total = evt["total"]
+    # Escape the preview slice and the remainder separately so the full
+    # output is the concatenation of the two and no character is escaped
+    # twice (html escaping is per-character, so splitting is safe).
+    esc_preview = escape(output[:2000])
+    esc_rest = escape(output[2000:]) if truncated else ""
+
+    sidebar_write('\n<a class="tree-node tree-role-tool" href="#')
+    sidebar_write(anchor)
+    sidebar_write('"><span class="tree-ts">')
+    sidebar_write(ts)
+    sidebar_write('</span> <span class="tree-content">\U0001f4e4 output (')
+    sidebar_write(str(len(output)))
+    sidebar_write(" chars)</span></a>")
+
+    messages_write('\n<div class="tool-execution success" id="')
+    messages_write(anchor)
+    messages_write('"><div class="tool-output')
+    if truncated:
+        messages_write(" expandable")
+    messages_write('" onclick="this.classList.toggle(\'expanded\')">')
+    messages_write('<div class="output-preview"><pre>')
+    messages_write(esc_preview)
+    if truncated:
+        messages_write('\n<span class="expand-hint">[click to expand ')
+        messages_write(str(len(output)))
+        messages_write(" chars]</span>")
+    messages_write('</pre></div><div class="output-full"><pre>')
+    messages_write(esc_preview)
+    messages_write(esc_rest)
+    messages_write("</pre></div></div></div>")
+
+
+def _render_task_complete(evt, ts, anchor, sidebar_write, messages_write):
+    text = evt.text
+    preview = text[:60].replace("\n", " ")
+    sidebar_write('\n<a class="tree-node tree-role-assistant" href="#')
+    sidebar_write(anchor)
+    sidebar_write('"><span class="tree-ts">')
+    sidebar_write(ts)
+    sidebar_write('</span> <span class="tree-content">\u2705 ')
+    sidebar_write(escape(preview))
+    sidebar_write("</span></a>")
+    messages_write('\n<div class="assistant-message final-answer" id="')
+    messages_write(anchor)
+    messages_write('"><div class="message-timestamp">')
+    messages_write(ts)
+    messages_write(' \u2014 final answer</div><div class="assistant-text markdown-content">')
+    messages_write(render_markdown(text))
+    messages_write("</div></div>")
+
+
+def _render_task_started(evt, ts, anchor, sidebar_write, messages_write):
+    sidebar_write('\n<a class="tree-node tree-role-system" href="#')
+    sidebar_write(anchor)
+    sidebar_write('"><span class="tree-ts">')
+    sidebar_write(ts)
+    sidebar_write('</span> <span class="tree-content">\u25b6 Turn started</span></a>')
+    messages_write('\n<div class="system-event" id="')
+    messages_write(anchor)
+    messages_write('"><div class="message-timestamp">')
+    messages_write(ts)
+    messages_write('</div><span class="event-label">\u25b6 Turn started</span></div>')
+
+
+def _render_turn_aborted(evt, ts, anchor, sidebar_write, messages_write):
+    reason = escape(evt.reason)
+    sidebar_write('\n<a class="tree-node tree-role-error" href="#')
+    sidebar_write(anchor)
+    sidebar_write('"><span class="tree-ts">')
+    sidebar_write(ts)
+    sidebar_write('</span> <span class="tree-content">\u26d4 Turn aborted: ')
+    sidebar_write(reason)
+    sidebar_write("</span></a>")
+    messages_write('\n<div class="system-event error-event" id="')
+    messages_write(anchor)
+    messages_write('"><div class="message-timestamp">')
+    messages_write(ts)
+    messages_write('</div><span class="event-label error-text">\u26d4 Turn aborted: ')
+    messages_write(reason)
+    messages_write("</span></div>")
+
+
+def _render_thread_rolled_back(evt, ts, anchor, sidebar_write, messages_write):
+    label = f'\u21a9 Rolled back {evt.num_turns} turn(s)'
+    sidebar_write('\n<a class="tree-node tree-role-system" href="#')
+    sidebar_write(anchor)
+    sidebar_write('"><span class="tree-ts">')
+    sidebar_write(ts)
+    sidebar_write('</span> <span class="tree-content">')
+    sidebar_write(label)
+    sidebar_write("</span></a>")
+    messages_write('\n<div class="system-event" id="')
+    messages_write(anchor)
+    messages_write('"><div class="message-timestamp">')
+    messages_write(ts)
+    messages_write('</div><span class="event-label">')
+    messages_write(label)
+    messages_write("</span></div>")
+
+
+def _render_token_count(evt, ts, anchor, sidebar_write, messages_write):
+    total = evt.total
     if total.get("input_tokens", 0) <= 0:
         return
     tok_str = (
@@ -254,17 +422,20 @@ def _render_token_count(evt, ts, anchor, sidebar, messages):
         f"out:{total.get('output_tokens',0):,} "
         f"reasoning:{total.get('reasoning_output_tokens',0):,}"
     )
-    sidebar.append(
-        f'<a class="tree-node tree-role-system" href="#{anchor}">'
-        f'<span class="tree-ts">{ts}</span> '
-        f'<span class="tree-content">\U0001f4ca {tok_str}</span></a>'
-    )
-    messages.append(
-        f'<div class="token-count" id="{anchor}">'
-        f'<div class="message-timestamp">{ts}</div>'
-        f'<span class="event-label">\U0001f4ca Tokens \u2014 {tok_str}</span>'
-        f"</div>"
-    )
+    sidebar_write('\n<a class="tree-node tree-role-system" href="#')
+    sidebar_write(anchor)
+    sidebar_write('"><span class="tree-ts">')
+    sidebar_write(ts)
+    sidebar_write('</span> <span class="tree-content">\U0001f4ca ')
+    sidebar_write(tok_str)
+    sidebar_write("</span></a>")
+    messages_write('\n<div class="token-count" id="')
+    messages_write(anchor)
+    messages_write('"><div class="message-timestamp">')
+    messages_write(ts)
+    messages_write('</div><span class="event-label">\U0001f4ca Tokens \u2014 ')
+    messages_write(tok_str)
+    messages_write("</span></div>")
 
 
 _EVENT_HANDLERS = {
@@ -284,9 +455,16 @@ _EVENT_HANDLERS = {
 
 # ---------------------------------------------------------------------------
 # HTML shell template
+#
+# The shell is written in three pieces around the streamed sidebar and
+# message content. Single f-strings rather than str.format on a template
+# constant, so the format-spec mini-language is never re-parsed and each
+# field is interpolated exactly once. All values arrive pre-escaped.
 # ---------------------------------------------------------------------------
 
-_HTML_TEMPLATE = """\
+def _write_shell_prefix(out: TextIO, *, title: str, css: str, session_ts: str) -> None:
+    """Write the document head and sidebar header, up to the tree container."""
+    out.write(f"""\
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -302,7 +480,7 @@ _HTML_TEMPLATE = """\
     <aside id="sidebar">
       <div class="sidebar-header">
         <h2>CODEX CLI SESSION</h2>
-        <div class="sidebar-meta">{session_id_short} \u00b7 {session_ts_short}</div>
+        <div class="sidebar-meta">{title} \u00b7 {session_ts}</div>
         <input type="text" class="sidebar-search" id="tree-search" placeholder="Filter entries..." oninput="filterTree(this.value)">
         <div class="sidebar-filters">
           <button class="filter-btn active" data-filter="default" onclick="setFilter('default', this)">Default</button>
@@ -312,7 +490,21 @@ _HTML_TEMPLATE = """\
           <button class="filter-btn" data-filter="all" onclick="setFilter('all', this)">All</button>
         </div>
       </div>
-      <div class="tree-container" id="tree-container">{sidebar_html}</div>
+      <div class="tree-container" id="tree-container">""")
+
+
+def _write_shell_mid(
+    out: TextIO,
+    *,
+    session_id: str,
+    session_ts: str,
+    model: str,
+    cli_version: str,
+    cwd: str,
+    git_info: str,
+) -> None:
+    """Write from the end of the sidebar to the start of the messages div."""
+    out.write(f"""</div>
     </aside>
     <main id="content">
       <div class="header">
@@ -326,10 +518,15 @@ _HTML_TEMPLATE = """\
           <div class="info-item"><span class="info-label">Git Branch</span><span class="info-value">{git_info}</span></div>
         </div>
       </div>
-      <div id="messages">{messages_html}</div>
+      <div id="messages">""")
+
+
+def _write_shell_suffix(out: TextIO, *, js: str, generated: str) -> None:
+    """Write from the end of the messages div to the end of the document."""
+    out.write(f"""</div>
       <div class="footer">Codex CLI session transcript \u00b7 Generated {generated}</div>
     </main>
   </div>
   <script>{js}</script>
 </body>
-</html>"""
+</html>""")
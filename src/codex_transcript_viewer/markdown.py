@@ -5,10 +5,110 @@ from __future__ import annotations
 import html
 import re
 
+try:  # C-backed single-pass escaping; optional, html.escape is the fallback
+    from markupsafe import escape as _ms_escape
+except ImportError:
+    _ms_escape = None
 
-def escape(text: str | None) -> str:
-    """HTML-escape text, returning empty string for None."""
-    return html.escape(str(text)) if text else ""
+# All markdown constructs fused into one alternation so the input is scanned
+# once instead of once per construct. Precompiled at module load. The fence
+# body uses [\s\S] instead of DOTALL so the inline patterns keep their
+# within-one-line behavior; inline code is confined to one line so a stray
+# backtick in prose cannot swallow a fence opener on the next line, and
+# *** is matched ahead of ** so bold-italic doesn't leave stray asterisks.
+_RE_MD = re.compile(
+    r"(?P<fence>```(?P<lang>\w*)\n(?P<fcode>[\s\S]*?)```)"
+    r"|(?P<code>`(?P<ctext>[^`\n]+)`)"
+    r"|(?P<bolditalic>\*\*\*(?!\*)(?P<bitext>.+?)\*\*\*)"
+    r"|(?P<bold>\*\*(?P<btext>.+?)\*\*)"
+    r"|(?P<italic>(?<!\*)\*(?!\*)(?P<itext>.+?)(?<!\*)\*(?!\*))"
+    r"|(?P<h>^(?P<hmarks>#{1,3}) (?P<htext>.+)$)"
+    r"|(?P<li>^- (?P<litext>.+)$)",
+    re.MULTILINE,
+)
+
+
+# Any character that can open a markdown construct. Text without one needs
+# no rendering beyond escaping, which skips the full alternation scan.
+_MARKDOWN_SNIFF = re.compile(r"[`*#]|^- ", re.MULTILINE)
+
+# Numeric indexes of the content groups, resolved once so the renderers
+# use positional group access instead of a name lookup per match.
+_G_LANG = _RE_MD.groupindex["lang"]
+_G_FCODE = _RE_MD.groupindex["fcode"]
+_G_CTEXT = _RE_MD.groupindex["ctext"]
+_G_BITEXT = _RE_MD.groupindex["bitext"]
+_G_BTEXT = _RE_MD.groupindex["btext"]
+_G_ITEXT = _RE_MD.groupindex["itext"]
+_G_HMARKS = _RE_MD.groupindex["hmarks"]
+_G_HTEXT = _RE_MD.groupindex["htext"]
+_G_LITEXT = _RE_MD.groupindex["litext"]
+
+
+def _md_fence(m: re.Match) -> str:
+    lang = m.group(_G_LANG) or ""
+    return f'<pre><code class="language-{lang}">{m.group(_G_FCODE)}</code></pre>'
+
+
+def _md_code(m: re.Match) -> str:
+    return f"<code>{m.group(_G_CTEXT)}</code>"
+
+
+def _md_bold_italic(m: re.Match) -> str:
+    return f"<strong><em>{_RE_MD.sub(_md_dispatch, m.group(_G_BITEXT))}</em></strong>"
+
+
+def _md_bold(m: re.Match) -> str:
+    return f"<strong>{_RE_MD.sub(_md_dispatch, m.group(_G_BTEXT))}</strong>"
+
+
+def _md_italic(m: re.Match) -> str:
+    return f"<em>{_RE_MD.sub(_md_dispatch, m.group(_G_ITEXT))}</em>"
+
+
+def _md_header(m: re.Match) -> str:
+    level = len(m.group(_G_HMARKS))
+    return f"<h{level}>{_RE_MD.sub(_md_dispatch, m.group(_G_HTEXT))}</h{level}>"
+
+
+def _md_list_item(m: re.Match) -> str:
+    return "• " + _RE_MD.sub(_md_dispatch, m.group(_G_LITEXT))
+
+
+# m.lastgroup is the name of the alternative that matched, so dispatch is a
+# single dict hit rather than probing each group for None in turn.
+_MD_RENDERERS = {
+    "fence": _md_fence,
+    "code": _md_code,
+    "bolditalic": _md_bold_italic,
+    "bold": _md_bold,
+    "italic": _md_italic,
+    "h": _md_header,
+    "li": _md_list_item,
+}
+
+
+def _md_dispatch(m: re.Match) -> str:
+    """Render whichever fused-pattern alternative matched.
+
+    Bold, italic, header, and list-item content is rendered recursively so
+    nested constructs (e.g. code inside a header) come out the same as with
+    the old sequential passes. Code content is emitted verbatim.
+    """
+    return _MD_RENDERERS[m.lastgroup](m)
+
+
+if _ms_escape is not None:
+
+    def escape(text: str | None) -> str:
+        """HTML-escape text, returning empty string for None."""
+        return str(_ms_escape(text)) if text else ""
+
+else:
+
+    def escape(text: str | None) -> str:
+        """HTML-escape text, returning empty string for None."""
+        return html.escape(str(text)) if text else ""
 
 
 def render_markdown(text: str) -> str:
@@ -16,43 +116,12 @@ def render_markdown(text: str) -> str:
 
     Handles fenced code blocks, inline code, bold, italic, headers, and
     unordered lists. Intended for session transcript content where full
-    CommonMark compliance is unnecessary.
+    CommonMark compliance is unnecessary. Deliberately not delegated to a
+    C markdown library: cmark's safe mode strips raw-HTML-looking text
+    (common in coding transcripts) instead of escaping it verbatim.
     """
-    escaped = escape(text)
-
-    # Fenced code blocks (```lang ... ```)
-    def _replace_code_block(m: re.Match) -> str:
-        lang = m.group(1) or ""
-        code = m.group(2)
-        return f'<pre><code class="language-{lang}">{code}</code></pre>'
-
-    escaped = re.sub(
-        r"```(\w*)\n(.*?)```", _replace_code_block, escaped, flags=re.DOTALL
-    )
-
-    # Inline code
-    escaped = re.sub(r"`([^`]+)`", r"<code>\1</code>", escaped)
-
-    # Bold
-    escaped = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", escaped)
-
-    # Italic (single asterisk, not adjacent to another asterisk)
-    escaped = re.sub(
-        r"(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)", r"<em>\1</em>", escaped
-    )
-
-    # Headers (h3 before h2 before h1 to avoid prefix conflicts)
-    escaped = re.sub(
-        r"^### (.+)$", r"<h3>\1</h3>", escaped, flags=re.MULTILINE
-    )
-    escaped = re.sub(
-        r"^## (.+)$", r"<h2>\1</h2>", escaped, flags=re.MULTILINE
-    )
-    escaped = re.sub(
-        r"^# (.+)$", r"<h1>\1</h1>", escaped, flags=re.MULTILINE
-    )
-
-    # Unordered list items
-    escaped = re.sub(r"^- (.+)$", r"• \1", escaped, flags=re.MULTILINE)
-
-    return escaped
+    # Plain text — the common case for short user messages — renders as
+    # its escaped self, so don't run the construct scan at all.
+    if _MARKDOWN_SNIFF.search(text) is None:
+        return escape(text)
+    return _RE_MD.sub(_md_dispatch, escape(text))
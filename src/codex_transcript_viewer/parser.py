@@ -3,158 +3,210 @@
 from __future__ import annotations
 
 import json
+import re
+import sys
 from pathlib import Path
-from typing import Any
+from typing import Any, NamedTuple
+
+try:  # orjson parses severalfold faster than stdlib json; optional
+    import orjson
+except ImportError:
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+# Entry types extract_conversation actually consumes. Lines of any other
+# type are dropped before the JSON decoder runs, based on a cheap sniff of
+# the line's leading bytes ("type" is an early key in Codex session lines).
+_RELEVANT_TYPES = frozenset((b"session_meta", b"event_msg", b"response_item"))
+_TYPE_RE = re.compile(rb'"type"\s*:\s*"([^"]+)"')
 
 
 def parse_jsonl(path: str | Path) -> list[dict]:
-    """Read a JSONL file and return a list of parsed JSON objects."""
+    """Read a JSONL file and return a list of parsed JSON objects.
+
+    The file is read as raw bytes and split on newlines, skipping the
+    text-mode decode/newline-translation machinery; both orjson and stdlib
+    json decode UTF-8 from bytes directly. Sessions comfortably fit in RAM.
+
+    Lines whose top-level ``type`` is not one the conversation extractor
+    understands are skipped without being decoded; a line where no type is
+    found in the sniff window is conservatively parsed anyway.
+    """
     entries = []
-    with open(path) as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                entries.append(json.loads(line))
-            except json.JSONDecodeError:
-                continue
+    with open(path, "rb") as f:
+        data = f.read()
+    for line in data.split(b"\n"):
+        line = line.strip()
+        if not line:
+            continue
+        m = _TYPE_RE.search(line, 0, 256)
+        if m is not None and m.group(1) not in _RELEVANT_TYPES:
+            continue
+        try:
+            entries.append(_loads(line))
+        except json.JSONDecodeError:
+            continue
     return entries
 
 
+class Event(NamedTuple):
+    """One typed conversation event extracted from a session line.
+
+    A NamedTuple rather than a dict: events are allocated once per line for
+    potentially very large sessions, and a tuple record costs a fraction of
+    a dict's per-object overhead while giving renderers direct attribute
+    access. Only ``type`` and ``ts`` are always meaningful; the remaining
+    fields default to empty and are populated per event kind.
+    """
+
+    type: str
+    ts: str
+    text: str = ""
+    name: str = ""
+    arguments: str = ""
+    call_id: str = ""
+    output: str = ""
+    phase: str = ""
+    reason: str = ""
+    turn_id: str = ""
+    num_turns: int = 0
+    model_context_window: int | str = ""
+    total: dict | None = None
+    images: list | None = None
+
+
 def extract_conversation(
     entries: list[dict],
-) -> tuple[dict | None, list[dict]]:
+) -> tuple[dict | None, list[Event]]:
     """Extract session metadata and meaningful conversation events.
 
     Returns (meta, events) where meta is the session_meta payload and events
-    is a flat list of typed dicts representing user messages, assistant
-    responses, tool calls, reasoning blocks, and system events.
+    is a flat list of :class:`Event` records representing user messages,
+    assistant responses, tool calls, reasoning blocks, and system events.
     """
-    events: list[dict] = []
+    events: list[Event] = []
     meta: dict | None = None
+    intern = sys.intern
 
     for entry in entries:
-        ts = entry.get("timestamp", "")
-        etype = entry.get("type", "")
-        payload = entry.get("payload", {})
+        # JSON-decoded strings are not interned; interning makes the dict
+        # lookup below (and the == chains in the handlers) hit the
+        # pointer-identity fast path against the literal keys.
+        etype = intern(entry.get("type", ""))
 
         if etype == "session_meta":
-            meta = payload
+            meta = entry.get("payload", {})
             continue
 
-        if etype == "event_msg":
-            _handle_event_msg(payload, ts, events)
-            continue
-
-        if etype == "response_item":
-            _handle_response_item(payload, ts, events)
-            continue
+        handler = _ENTRY_HANDLERS.get(etype)
+        if handler is not None:
+            handler(entry.get("payload", {}), entry.get("timestamp", ""), events)
 
     return meta, events
 
 
 def _handle_event_msg(
-    payload: dict[str, Any], ts: str, events: list[dict]
+    payload: dict[str, Any], ts: str, events: list[Event]
 ) -> None:
-    msg_type = payload.get("type", "")
+    msg_type = sys.intern(payload.get("type", ""))
 
     if msg_type == "user_message":
         events.append(
-            {
-                "type": "user_message",
-                "ts": ts,
-                "text": payload.get("message", ""),
-                "images": payload.get("local_images", []),
-            }
+            Event(
+                type="user_message",
+                ts=ts,
+                text=payload.get("message", ""),
+                images=payload.get("local_images", []),
+            )
         )
     elif msg_type == "agent_message":
         events.append(
-            {
-                "type": "agent_commentary",
-                "ts": ts,
-                "text": payload.get("message", ""),
-            }
+            Event(
+                type="agent_commentary",
+                ts=ts,
+                text=payload.get("message", ""),
+            )
         )
     elif msg_type == "agent_reasoning":
         events.append(
-            {
-                "type": "reasoning",
-                "ts": ts,
-                "text": payload.get("text", ""),
-            }
+            Event(
+                type="reasoning",
+                ts=ts,
+                text=payload.get("text", ""),
+            )
         )
     elif msg_type == "task_complete":
         events.append(
-            {
-                "type": "task_complete",
-                "ts": ts,
-                "text": payload.get("last_agent_message", ""),
-                "turn_id": payload.get("turn_id", ""),
-            }
+            Event(
+                type="task_complete",
+                ts=ts,
+                text=payload.get("last_agent_message", ""),
+                turn_id=payload.get("turn_id", ""),
+            )
         )
     elif msg_type == "task_started":
         events.append(
-            {
-                "type": "task_started",
-                "ts": ts,
-                "turn_id": payload.get("turn_id", ""),
-                "model_context_window": payload.get("model_context_window", ""),
-            }
+            Event(
+                type="task_started",
+                ts=ts,
+                turn_id=payload.get("turn_id", ""),
+                model_context_window=payload.get("model_context_window", ""),
+            )
         )
     elif msg_type == "turn_aborted":
         events.append(
-            {
-                "type": "turn_aborted",
-                "ts": ts,
-                "reason": payload.get("reason", ""),
-            }
+            Event(
+                type="turn_aborted",
+                ts=ts,
+                reason=payload.get("reason", ""),
+            )
         )
     elif msg_type == "token_count":
         info = payload.get("info") or {}
         total = info.get("total_token_usage", {})
         if total and any(v > 0 for v in total.values()):
             events.append(
-                {
-                    "type": "token_count",
-                    "ts": ts,
-                    "total": total,
-                }
+                Event(
+                    type="token_count",
+                    ts=ts,
+                    total=total,
+                )
             )
     elif msg_type == "thread_rolled_back":
         events.append(
-            {
-                "type": "thread_rolled_back",
-                "ts": ts,
-                "num_turns": payload.get("num_turns", 0),
-            }
+            Event(
+                type="thread_rolled_back",
+                ts=ts,
+                num_turns=payload.get("num_turns", 0),
+            )
         )
 
 
 def _handle_response_item(
-    payload: dict[str, Any], ts: str, events: list[dict]
+    payload: dict[str, Any], ts: str, events: list[Event]
 ) -> None:
-    item_type = payload.get("type", "")
+    item_type = sys.intern(payload.get("type", ""))
     role = payload.get("role", "")
 
     if item_type == "function_call":
         events.append(
-            {
-                "type": "tool_call",
-                "ts": ts,
-                "name": payload.get("name", ""),
-                "arguments": payload.get("arguments", ""),
-                "call_id": payload.get("call_id", ""),
-            }
+            Event(
+                type="tool_call",
+                ts=ts,
+                name=payload.get("name", ""),
+                arguments=payload.get("arguments", ""),
+                call_id=payload.get("call_id", ""),
+            )
         )
     elif item_type == "function_call_output":
         events.append(
-            {
-                "type": "tool_output",
-                "ts": ts,
-                "call_id": payload.get("call_id", ""),
-                "output": payload.get("output", ""),
-            }
+            Event(
+                type="tool_output",
+                ts=ts,
+                call_id=payload.get("call_id", ""),
+                output=payload.get("output", ""),
+            )
         )
     elif item_type == "message" and role == "assistant":
         content = payload.get("content", [])
@@ -162,21 +214,27 @@ def _handle_response_item(
         for block in content:
             if block.get("type") == "output_text":
                 events.append(
-                    {
-                        "type": "assistant_text",
-                        "ts": ts,
-                        "text": block.get("text", ""),
-                        "phase": phase,
-                    }
+                    Event(
+                        type="assistant_text",
+                        ts=ts,
+                        text=block.get("text", ""),
+                        phase=phase,
+                    )
                 )
     elif item_type == "reasoning":
         summary = payload.get("summary", [])
         for s in summary:
             if s.get("type") == "summary_text":
                 events.append(
-                    {
-                        "type": "reasoning",
-                        "ts": ts,
-                        "text": s.get("text", ""),
-                    }
+                    Event(
+                        type="reasoning",
+                        ts=ts,
+                        text=s.get("text", ""),
+                    )
                 )
+
+
+_ENTRY_HANDLERS = {
+    "event_msg": _handle_event_msg,
+    "response_item": _handle_response_item,
+}